@@ -1,4 +1,4 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 '''This script takes a ROS launch file as input and generates a dot graph
 file based on the tree of nodes and launch files that will be launched
 based on the input launch file.
@@ -35,38 +35,65 @@ based on the input launch file.
                             files used
 
 '''
+from __future__ import print_function
+
 import re
 import traceback
-from sys import argv
+from sys import argv, exc_info
 from copy import deepcopy
 from random import randint
 from datetime import datetime
-from os import system, environ
+from os import environ
 from argparse import ArgumentParser
-from collections import namedtuple
-import xml.etree.ElementTree as ET
+from collections import defaultdict, namedtuple, OrderedDict
 from os.path import abspath, exists, basename, splitext, sep, dirname
 
-import roslib
 import rospkg
 from roslaunch import substitution_args
 
+# Prefer lxml (when it is installed) since libxml2 is the fastest parser
+# available, and otherwise the C implementation of ElementTree, which is
+# considerably faster than the pure Python parser that is the default on
+# Python 2
+try:
+    from lxml import etree as ET
+except ImportError:
+    try:
+        import xml.etree.cElementTree as ET
+    except ImportError:
+        import xml.etree.ElementTree as ET
+
 try:
     import pygraphviz as gv
 except ImportError:
-    raise ImportError("Please run 'sudo apt-get install python-pygraphviz'")
+    raise ImportError("Please run 'sudo apt-get install python3-pygraphviz'")
 
 
 # List of filetypes that are recognized/supported as ROS launch files
 LAUNCH_FILE_TYPES = [".launch", ".test", ".xml"]
 
 
-# Keep track of a global set of launch files that have already been
-# visited so that we can protect ourselves from entering into an
+# Keep track of a global set of launch files that are currently being
+# parsed so that we can protect ourselves from entering into an
 # infinite loop of launch files if there happens to be a recursive
 # cycle in the graph
 VISITED_LAUNCH_FILES = set()
 
+# Map the resolved filename of each launch file that has been fully parsed
+# to its LaunchFile object so that launch files which are included multiple
+# times within the tree only get parsed once
+LAUNCH_FILE_CACHE = {}
+
+# Locate ROS packages in process rather than by calling out to rospack.
+# The package path is crawled once, and the location of every package
+# is cached, no matter how many times it is found within the launch tree
+ROSPACK = rospkg.RosPack()
+
+# Keep track of the (filename, exception type, message) for all errors
+# that have been reported while parsing so that a problem that affects
+# many elements is only displayed once for each launch file
+REPORTED_ERRORS = set()
+
 
 # Create a named tuple to store attributes pertaining to a node
 Node = namedtuple("Node", [
@@ -78,6 +105,13 @@ Node = namedtuple("Node", [
     "argSubs",  # The package that contains the rosparam file
     "isTestNode"])  # True if this is a test node, False otherwise
 
+# Create a named tuple to store attributes pertaining to an included
+# launch file
+Include = namedtuple("Include", [
+    "launchFile",  # The LaunchFile object that is included
+    "argSubs",  # The dictionary of argument substitutions needed for the file
+    ])
+
 # Create a named tuple to store attributes pertaining to a rosparam file
 RosParam = namedtuple("RosParamFile", [
     "filename",   # The resolved filename for the rosparam file
@@ -138,6 +172,20 @@ class LaunchFile:
     OptEnvSubstitutionArg = "optenv"
     DirnameSubstitutionArg = "dirname"
 
+    # Map the values allowed for the if and unless attributes to the
+    # boolean value that they represent. The values are case insensitive,
+    # the common capitalizations are included so they can be found directly
+    ConditionalValues = {
+        "true": True,
+        "True": True,
+        "TRUE": True,
+        "1": True,
+        "false": False,
+        "False": False,
+        "FALSE": False,
+        "0": False,
+    }
+
     # Identifiers for various rosparam commands
     DumpCommand = "dump"
     LoadCommand = "load"
@@ -157,20 +205,26 @@ class LaunchFile:
     SubgraphPenWidth = "3"
 
     # The regular expression used to match substitution arguments
-    SubArgsPattern = "\$\(([a-zA-Z_]+) ?([a-zA-Z0-9_! ]*)\)"
-    FindArgsPattern = "\$\(arg ([a-zA-Z0-9_]+)\)"
+    SubArgsPattern = r"\$\(([a-zA-Z_]+) ?([a-zA-Z0-9_! ]*)\)"
+    FindArgsPattern = r"\$\(arg ([a-zA-Z0-9_]+)\)"
+
+    # Compile the regular expressions once since they are used to resolve
+    # nearly every attribute in the launch file tree
+    SubArgsRegex = re.compile(SubArgsPattern)
+    FindArgsRegex = re.compile(FindArgsPattern)
+
+    # Maximum number of times substitution arguments are resolved within
+    # a single piece of text
+    MaxSubstitutionPasses = 32
 
     def __init__(self,
                  args,
                  filename,
-                 includeArgs=None,
                  overrideArgs=None,
                  ancestors=None):
         '''
         * args -- command line arguments
         * filename -- the ROS launch file
-        * includeArgs -- dictionary of arg substitution name value pairs
-                         that were used to resolve the name of this launch file
         * overrideArgs -- dictionary of arguments that override any
                           arguments specified in this launch file
         * ancestors -- List of launch files which are ancestors of
@@ -186,14 +240,12 @@ class LaunchFile:
 
         # Cannot use dictionary in default argument because the same
         # object will get reused
-        self.__includeArgs = {} if includeArgs is None else includeArgs
         self.__overrideArgs = {} if overrideArgs is None else overrideArgs
 
-        # Determine if this launch file has been parsed before
+        # Determine if this launch file is already being parsed
         hasVisited = (filename in VISITED_LAUNCH_FILES)
 
         self.__filename = filename
-        VISITED_LAUNCH_FILES.add(filename)
 
         # Check if the filename actually exists
         self.__missing = (not exists(self.__filename))
@@ -202,6 +254,10 @@ class LaunchFile:
         # its resolved value
         self.__args = {}
 
+        # Dictionary mapping text that contains substitution arguments to
+        # the resolved text, for the args that are currently defined
+        self.__resolvedText = {}
+
         # Map launch file substitution arguments (e.g, 'find', 'arg') to the
         # function that handle resolving the substitution argument
         self.__substitutionArgFnMap = {
@@ -213,8 +269,10 @@ class LaunchFile:
             self.DirnameSubstitutionArg: self.__onDirnameSubstitutionArg,
         }
 
-        # List of launch file objects which are included by the launch file
-        self.__includes = []
+        # Ordered dictionary mapping the filename of each launch file which is
+        # included by the launch file to its Include namedtuple object. A
+        # launch file that is included multiple times only appears once
+        self.__includes = OrderedDict()
 
         # Create a list of launch filenames that cycles back to previously
         # visited launch files so that these cycles can be differentiated
@@ -227,15 +285,44 @@ class LaunchFile:
         # List of RosParam namedtuplem objects included by this launch file
         self.__rosParamFiles = []
 
+        # Map launch file tags (other than args) to a tuple containing the
+        # function that parses the tag, and the function that stores the
+        # parsed result (or None if the function does not return a result)
+        self.__tagHandlers = {
+            self.GroupTag: (self.__parseGroupTag, None),
+            self.IncludeTag: (self.__parseIncludeTag, self.__addInclude),
+            self.NodeTag: (self.__parseNodeTag, self.__nodes.append),
+            self.RosParamTag: (self.__parseRosParam, None),
+            self.TestTag: (self.__parseTestNodeTag, self.__nodes.append),
+        }
+
+        # The launch file tree does not change once it has been parsed, so
+        # these are only computed the first time that they are requested
+        self.__allLaunchFiles = None
+        self.__allNodes = None
+        self.__packageMap = None
+
+        # The clean name and package name only depend on the filename, so
+        # they are computed the first time that they are requested
+        self.__cleanName = None
+        self.__packageName = None
+
         # Protect against cycles in the launch files
         if not hasVisited:
-            #### Only parse the file when it has not been visited before
-            if not self.__missing:
-                # Only parse if the file exists
-                self.__parseLaunchFile(filename)
-            else:
-                print "WARNING: Could not locate launch " \
-                    "file: %s" % self.__filename
+            #### Only parse the file when it is not already being parsed
+            VISITED_LAUNCH_FILES.add(filename)
+            try:
+                if not self.__missing:
+                    # Only parse if the file exists
+                    self.__parseLaunchFile(filename)
+                else:
+                    print("WARNING: Could not locate launch "
+                          "file: %s" % self.__filename)
+            finally:
+                VISITED_LAUNCH_FILES.discard(filename)
+
+            # The launch file is complete, allow it to be reused
+            LAUNCH_FILE_CACHE[filename] = self
 
     #### Getter functions
 
@@ -260,7 +347,11 @@ class LaunchFile:
 
     def getCleanName(self):
         '''Get the clean (no periods) name for this launch file.'''
-        return splitext(basename(self.__filename))[0].replace(".", "_")
+        if self.__cleanName is None:
+            self.__cleanName = \
+                splitext(basename(self.__filename))[0].replace(".", "_")
+
+        return self.__cleanName
 
     def getDotNodeName(self):
         '''Get the name of the dot node corresponding to this launch file.'''
@@ -271,42 +362,45 @@ class LaunchFile:
 
     def getPackageName(self):
         '''Get the name of the package that contains this launch file.'''
-        packageName = rospkg.get_package_name(self.__filename)
-        if not packageName:
-            raise Exception("Failed to get package name for: %s" %
-                            self.__filename)
+        if self.__packageName is None:
+            packageName = rospkg.get_package_name(self.__filename)
+            if not packageName:
+                raise Exception("Failed to get package name for: %s" %
+                                self.__filename)
 
-        return packageName
+            self.__packageName = packageName
+
+        return self.__packageName
 
     def getAllLaunchFiles(self):
         '''Get the entire list of launch files included because of
-        this launch file.
+        this launch file. Each LaunchFile object only appears in the list
+        once, but the placeholder objects created for cyclic includes are
+        separate objects, so the same filename may appear more than once.
 
         '''
-        launchFiles = [self]  # Add ourself
-
-        # Recursively add all of our children
-        for launchFile in self.__includes:
-            launchFiles.extend(launchFile.getAllLaunchFiles())
+        if self.__allLaunchFiles is None:
+            launchFiles = []
+            self.__addLaunchFiles(launchFiles, set())
+            self.__allLaunchFiles = launchFiles
 
-        return launchFiles
+        return self.__allLaunchFiles
 
     def getAllNodes(self):
         '''Get all of the nodes that will be launched because of this launch
         file and any launch files it includes.
 
         '''
-        allNodes = []
+        if self.__allNodes is None:
+            allNodes = []
 
-        # Add our own nodes
-        for node in self.__nodes:
-            allNodes.append(node)
+            # Add the nodes from every launch file in the tree
+            for launchFile in self.getAllLaunchFiles():
+                allNodes.extend(launchFile.__nodes)
 
-        # Recursively add remaining nodes
-        for include in self.__includes:
-            allNodes.extend(include.getAllNodes())
+            self.__allNodes = allNodes
 
-        return allNodes
+        return self.__allNodes
 
     def getAllRosParamFiles(self):
         '''Get the entire list of rosparam files included because of
@@ -315,13 +409,9 @@ class LaunchFile:
         '''
         rosParamFiles = []
 
-        # Add our own rosparam files
-        for rosParam in self.__rosParamFiles:
-            rosParamFiles.append(rosParam)
-
-        # Recursively add all of our children's rosparam files
-        for launchFile in self.__includes:
-            rosParamFiles.extend(launchFile.getAllRosParamFiles())
+        # Add the rosparam files from every launch file in the tree
+        for launchFile in self.getAllLaunchFiles():
+            rosParamFiles.extend(launchFile.__rosParamFiles)
 
         return rosParamFiles
 
@@ -333,14 +423,15 @@ class LaunchFile:
         includeMap = {}
 
         # Include a mapping for my own included launch files
-        includeMap[self.__filename] = self.__includes
+        includeMap[self.__filename] = [
+            include.launchFile for include in self.__includes.values()]
 
         # Add mappings for each of the subchildren
-        for childLaunch in self.__includes:
-            childMappings = childLaunch.getIncludeMap()
+        for include in self.__includes.values():
+            childMappings = include.launchFile.getIncludeMap()
 
             # Join the two dictionaries together
-            includeMap = dict(includeMap.items() + childMappings.items())
+            includeMap.update(childMappings)
 
         return includeMap
 
@@ -351,34 +442,47 @@ class LaunchFile:
         ROS nodes included from that ROS package.
 
         '''
-        # Grab the list of all launch files
-        allLaunchFiles = self.getAllLaunchFiles()
+        if self.__packageMap is not None:
+            return self.__packageMap
 
-        packageMap = {}
+        # Packages are created the first time they are referenced
+        packageMap = defaultdict(lambda: PackageItems([], [], []))
 
-        ########################################
-        # Add all launch files to their respective packages
-        for launchFile in allLaunchFiles:
-            packageName = launchFile.getPackageName()
-            items = packageMap.get(packageName, PackageItems([], [], []))
-            items.launchFiles.append(launchFile)
-            packageMap[packageName] = items
+        # Add all launch files, nodes, and rosparam files to their respective
+        # packages in a single pass over the launch file tree
+        for launchFile in self.getAllLaunchFiles():
+            packageMap[launchFile.getPackageName()].launchFiles.append(
+                launchFile)
 
-        ########################################
-        # Add all nodes to their respective packages
-        for node in self.getAllNodes():
-            items = packageMap.get(node.package, PackageItems([], [], []))
-            items.nodes.append(node)
-            packageMap[node.package] = items
+            for node in launchFile.__nodes:
+                packageMap[node.package].nodes.append(node)
+
+            for rosParam in launchFile.__rosParamFiles:
+                packageMap[rosParam.package].rosParamFiles.append(rosParam)
+
+        # Return a standard dictionary so that looking up an unknown
+        # package does not silently add it to the map
+        self.__packageMap = dict(packageMap)
+        return self.__packageMap
+
+    def __addLaunchFiles(self, launchFiles, visited):
+        '''Recursively add this launch file, and all of the launch files it
+        includes, to the given list of launch files.
 
-        ########################################
-        # Add all rosparam files to their respective packages
-        for rosParam in self.getAllRosParamFiles():
-            items = packageMap.get(rosParam.package, PackageItems([], [], []))
-            items.rosParamFiles.append(rosParam)
-            packageMap[rosParam.package] = items
+        * launchFiles -- the list of launch files to add to
+        * visited -- the set of LaunchFile objects already added
 
-        return packageMap
+        '''
+        # Shared launch files only need to be added once
+        if self in visited:
+            return
+
+        visited.add(self)
+        launchFiles.append(self)  # Add ourself
+
+        # Recursively add all of our children
+        for include in self.__includes.values():
+            include.launchFile.__addLaunchFiles(launchFiles, visited)
 
     #### Dot graph functions
 
@@ -406,13 +510,14 @@ class LaunchFile:
         # Set node attributes
         graph.node_attr.update(fontsize="35")
 
-        # Set edge attributes
-        graph.edge_attr.update(fontsize="35")
+        # Set edge attributes -- every edge shares the same pen width, so it
+        # is set once for the graph rather than on each individual edge
+        graph.edge_attr.update(fontsize="35", penwidth=self.LinePenWidth)
 
         #### Create a subgraph for every known package
         self.__clusterNum = 0
         allNodeNames = set()  # Set of node names to check for duplicates
-        for packageName, packageItems in packageMap.iteritems():
+        for packageName, packageItems in packageMap.items():
             self.__createPackageSubgraph(
                 graph, packageName, packageItems, allNodeNames)
 
@@ -426,7 +531,7 @@ class LaunchFile:
 
             # Add a single line to the label for the node for each arg
             # name value pair that was specified on the command line
-            for argName, argValue in self.__overrideArgs.iteritems():
+            for argName, argValue in self.__overrideArgs.items():
                 # Create a label each command line argument
                 label = "%s:=%s" % (argName, argValue)
                 claLines.append(label)
@@ -449,135 +554,125 @@ class LaunchFile:
             graph.add_edge(
                 claNodeName,
                 mainLaunchFileNodeName,
-                penwidth=self.LinePenWidth,
                 color=self.LineColor)
 
-        #### Create connections between all launch files
-
-        # Iterate over all packages contained in the launch tree
-        for _, packageItems in packageMap.iteritems():
-            # Iterate over all launch files in this package
-            for launchFile in packageItems.launchFiles:
-                parentNodeName = launchFile.getDotNodeName()
-
-                # Grab the list of cycles for this launch file
-                cycles = launchFile.getCycles()
+        # Keep track of the edges that have been added to the graph so that
+        # identical edges (e.g., a launch file that includes the same
+        # launch file multiple times) are only added once
+        addedEdges = set()
 
-                # Iterate over all launch files included by the
-                # current launch file
-                for include in launchFile.__includes:
-                    includeFilename = include.getFilename()
-                    includeNodeName = include.getDotNodeName()
+        #### Create connections between all launch files
 
-                    # Determine if this include is a cycle to a previously
-                    # visited node
-                    isCycle = (includeFilename in cycles)
+        # Iterate over all launch files contained in the launch tree
+        for launchFile in self.getAllLaunchFiles():
+            parentNodeName = launchFile.getDotNodeName()
 
-                    # Select a color depending on if this is a standard
-                    # connection between launch files, or a cycle to a
-                    # previously parsed launch file
-                    color = self.CycleLineColor if isCycle else self.LineColor
+            # Grab the list of cycles for this launch file
+            cycles = launchFile.getCycles()
 
-                    label = ""
-
-                    # Grab the set of arg substitutions used to conditionally
-                    # include the launch file so that the edge can be labeled
-                    # and styled accordingly
-                    argSubs = include.__includeArgs
-                    if len(argSubs) > 0:
-                        # Change the color of the line to indicate that it
-                        # required arg substitutions
-                        color = self.ConditionalLineColor
+            # Iterate over all launch files included by the
+            # current launch file
+            for include in launchFile.__includes.values():
+                includeFilename = include.launchFile.getFilename()
+                includeNodeName = include.launchFile.getDotNodeName()
 
-                        # Convert all arg name value pairs into a single
-                        # string, e.g., given {"one": "two", "three": "four"}
-                        # the resulting string should be:
-                        #    "one:=two\nthree:=four"
-                        # So that each arg pair is on its own line
-                        # for improved readability
-                        label = '\n'.join(map(
-                            lambda t: ":=".join(map(str, t)), argSubs.items()))
+                # Determine if this include is a cycle to a previously
+                # visited node
+                isCycle = (includeFilename in cycles)
 
-                    graph.add_edge(
-                        parentNodeName,
-                        includeNodeName,
-                        label=label,
-                        penwidth=self.LinePenWidth,
-                        color=color)
+                # Select a color depending on if this is a standard
+                # connection between launch files, or a cycle to a
+                # previously parsed launch file
+                color = self.CycleLineColor if isCycle else self.LineColor
 
-        #### Create connections between launch files and nodes
-        for _, packageItems in packageMap.iteritems():
-            # Iterate over the nodes in this package
-            for node in packageItems.nodes:
-                # Grab the dot node name of the launch file for this node
-                launchNodeName = node.launchFile.getDotNodeName()
-
-                # Check if this ROS node required any arguments to be evaluated
-                # in order to include it in the tree, and label the edge with
-                # the arguments and their values
                 label = ""
-                color = self.LineColor
-                if len(node.argSubs) > 0:
+
+                # Grab the set of arg substitutions used to conditionally
+                # include the launch file so that the edge can be labeled
+                # and styled accordingly
+                argSubs = include.argSubs
+                if len(argSubs) > 0:
                     # Change the color of the line to indicate that it
                     # required arg substitutions
                     color = self.ConditionalLineColor
 
-                    # Convert all arg name value pairs into a single
-                    # string, e.g., given {"one": "two", "three": "four"}
-                    # the resulting string should be:
-                    #    "one:=two\nthree:=four"
-                    # So that each arg pair is on its own line
-                    # for improved readability
-                    label = '\n'.join(map(
-                        lambda t: ":=".join(map(str, t)),
-                        node.argSubs.items()))
+                    # Label the line with the arg name value pairs
+                    label = self.__getArgSubsLabel(argSubs)
+
+                edge = (parentNodeName, includeNodeName, label, color)
+                if edge in addedEdges:
+                    continue  # Skip duplicate edges
+                addedEdges.add(edge)
 
                 graph.add_edge(
-                    launchNodeName,
-                    node.dotNodeName,
+                    parentNodeName,
+                    includeNodeName,
                     label=label,
-                    penwidth=self.LinePenWidth,
                     color=color)
 
+        #### Create connections between launch files and nodes
+        for node in self.getAllNodes():
+            # Grab the dot node name of the launch file for this node
+            launchNodeName = node.launchFile.getDotNodeName()
+
+            # Check if this ROS node required any arguments to be evaluated
+            # in order to include it in the tree, and label the edge with
+            # the arguments and their values
+            label = ""
+            color = self.LineColor
+            if len(node.argSubs) > 0:
+                # Change the color of the line to indicate that it
+                # required arg substitutions
+                color = self.ConditionalLineColor
+
+                # Label the line with the arg name value pairs
+                label = self.__getArgSubsLabel(node.argSubs)
+
+            edge = (launchNodeName, node.dotNodeName, label, color)
+            if edge in addedEdges:
+                continue  # Skip duplicate edges
+            addedEdges.add(edge)
+
+            graph.add_edge(
+                launchNodeName,
+                node.dotNodeName,
+                label=label,
+                color=color)
+
         #### Create connections between launch files and rosparam files
         if self.__inputArgs.showRosParamNodes:
-            # Iterate over all packages contained in the launch tree
-            for _, packageItems in packageMap.iteritems():
-                # Iterate over all launch files in this package
-                for launchFile in packageItems.launchFiles:
-                    launchNodeName = launchFile.getDotNodeName()
-
-                    # Iterate over all rosparam files needed by the launch file
-                    for rosParam in launchFile.__rosParamFiles:
-                        # Default attributes
-                        color = self.LineColor
-                        label = ""
-
-                        # Grab the set of arg substitutions used to
-                        # conditionally include the launch file so that the
-                        # edge can be labeled and styled accordingly
-                        argSubs = rosParam.argSubs
-                        if len(argSubs) > 0:
-                            # Change the color of the line to indicate that it
-                            # required arg substitutions
-                            color = self.ConditionalLineColor
-
-                            # Convert all arg name value pairs into a single
-                            # string, e.g., given {"one": "2", "three": "4"}
-                            # the resulting string should be:
-                            #    "one:=2\nthree:=4"
-                            # So that each arg pair is on its own line
-                            # for improved readability
-                            label = '\n'.join(map(
-                                lambda t: ":=".join(map(str, t)),
-                                argSubs.items()))
-
-                        graph.add_edge(
-                            launchNodeName,
-                            rosParam.dotNodeName,
-                            label=label,
-                            penwidth=self.LinePenWidth,
-                            color=color)
+            # Iterate over all launch files contained in the launch tree
+            for launchFile in self.getAllLaunchFiles():
+                launchNodeName = launchFile.getDotNodeName()
+
+                # Iterate over all rosparam files needed by the launch file
+                for rosParam in launchFile.__rosParamFiles:
+                    # Default attributes
+                    color = self.LineColor
+                    label = ""
+
+                    # Grab the set of arg substitutions used to
+                    # conditionally include the launch file so that the
+                    # edge can be labeled and styled accordingly
+                    argSubs = rosParam.argSubs
+                    if len(argSubs) > 0:
+                        # Change the color of the line to indicate that it
+                        # required arg substitutions
+                        color = self.ConditionalLineColor
+
+                        # Label the line with the arg name value pairs
+                        label = self.__getArgSubsLabel(argSubs)
+
+                    edge = (launchNodeName, rosParam.dotNodeName, label, color)
+                    if edge in addedEdges:
+                        continue  # Skip duplicate edges
+                    addedEdges.add(edge)
+
+                    graph.add_edge(
+                        launchNodeName,
+                        rosParam.dotNodeName,
+                        label=label,
+                        color=color)
 
         return graph
 
@@ -596,6 +691,12 @@ class LaunchFile:
         '''
         subgraphNodes = []
 
+        # Every item in the package shares the same package line in its
+        # label, which is only included if groups are disabled
+        packageLabel = ""
+        if self.__inputArgs.disableGroups:
+            packageLabel = "\npkg: " + packageName
+
         #### Add one node per launch file contained within this package
         for launchFile in packageItems.launchFiles:
             baseFilename = basename(launchFile.getFilename())
@@ -605,10 +706,7 @@ class LaunchFile:
             color = self.MissingFileColor if launchFile.isMissing() else \
                     self.LaunchFileColor
 
-            label = baseFilename
-            if self.__inputArgs.disableGroups:
-                #### Include the package name if groups are disabled
-                label = label + "\npkg: " + packageName
+            label = baseFilename + packageLabel
 
             # Add a node for each launch file
             graph.add_node(
@@ -631,23 +729,20 @@ class LaunchFile:
             # ROS nodes must have unique names, thus alert the user if
             # there are two nodes that have the same name
             if node.name in allNodeNames:
-                print "WARNING: There are two nodes in the launch tree " \
-                    "that have the same name: %s" % node.name
+                print("WARNING: There are two nodes in the launch tree "
+                      "that have the same name: %s" % node.name)
 
                 # Modify the style of the node if it is a duplicate
                 color = self.DuplicateNodeColor
 
             allNodeNames.add(node.name)
 
-            label = node.name
-            if self.__inputArgs.disableGroups:
-                #### Include the package name if groups are disabled
-                label = label + "\npkg: " + packageName
+            label = node.name + packageLabel
 
             # Create the label for the node
             if self.__inputArgs.showNodeType:
                 #### Include the node type in addition to its name
-                label = label + "\ntype: " + node.nodeType
+                label += "\ntype: " + node.nodeType
 
             ## Add a node for each node
             graph.add_node(
@@ -665,9 +760,7 @@ class LaunchFile:
         if self.__inputArgs.showRosParamNodes:
             for rosParam in packageItems.rosParamFiles:
                 # Add the package name when groups are disabled
-                label = rosParam.name
-                if self.__inputArgs.disableGroups:
-                    label = label + "\npkg: " + rosParam.package
+                label = rosParam.name + packageLabel
 
                 # Update the color of the node in the event that the
                 # file is not found
@@ -707,7 +800,7 @@ class LaunchFile:
         try:
             tree = ET.parse(filename)
             root = tree.getroot()
-        except Exception, e:
+        except Exception as e:
             raise Exception(
                 "Error while parsing launch file: %s: %s" % (filename, e))
 
@@ -726,51 +819,37 @@ class LaunchFile:
         # Now we can load all include tags and nodes because we have all of the
         # potential arguments we need
         for child in root:
-            # Handle all types of tags
+            # Errors for args are not ignored since any element that uses
+            # the arg would not be able to be resolved
             if child.tag == self.ArgTag:
-                # Parse the argument
                 self.__parseArgTag(child)
-            elif child.tag == self.IncludeTag:
-                try:
-                    launchFile = self.__parseIncludeTag(child)
-                except:
-                    traceback.print_exc()
-                    continue  # Ignore error
-                else:
-                    if launchFile is not None:
-                        self.__includes.append(launchFile)
-            elif child.tag == self.GroupTag:
-                try:
-                    self.__parseGroupTag(child)
-                except:
-                    traceback.print_exc()
-                    continue  # Ignore error
-            elif child.tag == self.NodeTag:
-                try:
-                    node = self.__parseNodeTag(child)
-                except:
-                    traceback.print_exc()
-                    continue  # Ignore error
-                else:
-                    # Node is disabled (i.e., if=false, or unless=true)
-                    if node is not None:
-                        self.__nodes.append(node)
-            elif child.tag == self.RosParamTag:
-                try:
-                    self.__parseRosParam(child)
-                except:
-                    traceback.print_exc()
-                    continue  # Ignore error
-            elif child.tag == self.TestTag:
-                try:
-                    testNode = self.__parseTestNodeTag(child)
-                except:
-                    traceback.print_exc()
-                    continue  # Ignore error
-                else:
-                    # Test node is disabled (i.e., if=false, or unless=true)
-                    if testNode is not None:
-                        self.__nodes.append(testNode)
+                continue
+
+            # Look up how to handle all other types of tags
+            handler = self.__tagHandlers.get(child.tag, None)
+            if handler is None:
+                continue  # Unsupported tag
+
+            parseFn, storeFn = handler
+            try:
+                result = parseFn(child)
+            except Exception:
+                self.__reportError()
+                continue  # Ignore error
+
+            # Disabled elements (i.e., if=false, or unless=true) do not
+            # produce a result
+            if storeFn is not None and result is not None:
+                storeFn(result)
+
+    def __addInclude(self, include):
+        '''Add an included launch file to this launch file, unless the
+        same launch file has already been included.
+
+        * include -- the Include namedtuple object
+
+        '''
+        self.__includes.setdefault(include.launchFile.getFilename(), include)
 
     def __parseArgTag(self, arg):
         '''Parse the argument tag from a launch file.
@@ -784,6 +863,9 @@ class LaunchFile:
         if value is not None:
             self.__args[name] = value
 
+            # Previously resolved text may depend on the value of this arg
+            self.__resolvedText.clear()
+
             # Determine if the 'value' attribute was specified for this
             # argument, if it was then we do not want to allow it to
             # be overriden
@@ -791,8 +873,8 @@ class LaunchFile:
             if valueSpecified and name in self.__overrideArgs:
                 del self.__overrideArgs[name]  # Remove it from the override
 
-                print "WARNING: cannot override arg '%s', which has " \
-                    "already been set." % name
+                print("WARNING: cannot override arg '%s', which has "
+                      "already been set." % name)
 
     def __parseIncludeTag(self, include):
         '''Parse the include tag from a launch file.
@@ -844,8 +926,8 @@ class LaunchFile:
         # launch file includes a launch file directly in its own ancestor tree
         hasVisited = (resolved in self.__ancestors)
         if hasVisited:
-            print "ERROR: There is a cycle in the launch file " \
-                "graph from: '%s' to '%s'" % (self.__filename, resolved)
+            print("ERROR: There is a cycle in the launch file "
+                  "graph from: '%s' to '%s'" % (self.__filename, resolved))
             self.__cycles.append(resolved)  # Add the filename
 
         # Iterate over all children of the include tag to determine if we
@@ -865,15 +947,20 @@ class LaunchFile:
         # Check for rosparams specified under the include tag
         self.__findRosParams(include)
 
-        # Create the new launch file and parse it -- pass the argument
-        # overrides to the child launch file to override the argument anywhere
-        # it is defined
-        return LaunchFile(
-            self.__inputArgs,
-            resolved,
-            includeArgs=argSubs,
-            overrideArgs=inheritedArgs,
-            ancestors=self.__ancestors)
+        # Launch files that have already been parsed elsewhere in the tree
+        # are reused rather than being parsed again
+        launchFile = LAUNCH_FILE_CACHE.get(resolved, None)
+        if launchFile is None:
+            # Create the new launch file and parse it -- pass the argument
+            # overrides to the child launch file to override the argument
+            # anywhere it is defined
+            launchFile = LaunchFile(
+                self.__inputArgs,
+                resolved,
+                overrideArgs=inheritedArgs,
+                ancestors=self.__ancestors)
+
+        return Include(launchFile, argSubs)
 
     def __parseNodeTag(self, node):
         '''Parse the node tag from a launch file.
@@ -936,9 +1023,9 @@ class LaunchFile:
             if child.tag == self.RosParamTag:
                 try:
                     self.__parseRosParam(child)
-                except:
-                    traceback.print_exc()
-                    print "WARNING: parsing rosparam"
+                except Exception:
+                    if self.__reportError():
+                        print("WARNING: parsing rosparam")
                     continue  # Ignore error
 
     def __parseRosParam(self, rosparam):
@@ -969,8 +1056,8 @@ class LaunchFile:
                 # Determine what ROS package contains the rosparam file
                 package = rospkg.get_package_name(resolved)
                 if package is None:
-                    print "ERROR: Failed to find package for rosparam " \
-                        "file: %s" % resolved
+                    print("ERROR: Failed to find package for rosparam "
+                          "file: %s" % resolved)
                     return  # Skip the file
 
                 # Create a unique name for the dot node
@@ -1085,7 +1172,25 @@ class LaunchFile:
         * text -- the text to resolve
 
         '''
-        
+        # Most text does not contain any substitution arguments at all
+        if "$(" not in text:
+            return text
+
+        # The same text tends to be used many times throughout a launch file
+        resolved = self.__resolvedText.get(text, None)
+        if resolved is None:
+            resolved = self.__resolveSubstitutionArgs(text)
+            self.__resolvedText[text] = resolved
+
+        return resolved
+
+    def __resolveSubstitutionArgs(self, text):
+        '''Resolve all of the ROS launch substitution arguments contained
+        within the given text, without using the cache of resolved text.
+
+        * text -- the text to resolve
+
+        '''
         # special handling of $(eval ...)
         if text.startswith('$(eval ') and text.endswith(')'):
             arg = self.__args.copy()
@@ -1101,29 +1206,38 @@ class LaunchFile:
         # resolved, e.g.,:
         #    $(find package)/launch/file.launch
         #    $(find package)/launch/$(arg camera).launch
-        pattern = re.compile(self.SubArgsPattern)
+        #
+        # Identical substitution arguments resolve to the same value
+        # everywhere in the text (e.g., multiple uses of $(anon name))
+        resolvedArgs = {}
 
-        # Continue until all substitution arguments in the text
-        # have been resolved
-        results = pattern.search(text)
-        while results is not None:
+        def substitute(results):
             fullText = results.group()
-            subArg, argument = results.groups()
-            # Grab the function to handle this specific substitution argument
-            substitutionFn = self.__substitutionArgFnMap.get(subArg, None)
-            if substitutionFn is None:
-                raise Exception(
-                    "Include has unknown substitution argument %s" % subArg)
+            if fullText not in resolvedArgs:
+                subArg, argument = results.groups()
+
+                # Grab the function to handle this specific
+                # substitution argument
+                substitutionFn = self.__substitutionArgFnMap.get(subArg, None)
+                if substitutionFn is None:
+                    raise Exception(
+                        "Include has unknown substitution argument %s" %
+                        subArg)
+
+                # Attempt to resolve the substitution argument
+                resolvedArgs[fullText] = substitutionFn(argument)
 
-            # Attempt to resolve the substitution argument
-            resolved = substitutionFn(argument)
+            return resolvedArgs[fullText]
 
-            # Update the text with the value of the
-            # resolved substitution argument
-            text = text.replace(fullText, resolved)
+        # Resolved values may contain substitution arguments of their own,
+        # so continue until the text stops changing (up to a limit, to
+        # protect against substitution arguments that expand forever)
+        for _ in range(self.MaxSubstitutionPasses):
+            resolved = self.SubArgsRegex.sub(substitute, text)
+            if resolved == text:
+                break  # All substitution arguments have been resolved
 
-            # Check for another substitution
-            results = pattern.search(text)
+            text = resolved
 
         return text
 
@@ -1188,7 +1302,16 @@ class LaunchFile:
         * package -- the ROS package to find
 
         '''
-        return roslib.packages.get_pkg_dir(package)
+        try:
+            return ROSPACK.get_path(package)
+        except rospkg.ResourceNotFound:
+            pass
+
+        # Raised outside of the except block so that the rospkg error is
+        # not chained to this one under Python 3
+        raise Exception(
+            "Cannot locate installation of package %s: [rospack] "
+            "Error: package '%s' not found" % (package, package))
 
     def __getSubstitutionArgs(self, text):
         '''Return a dictionary mapping arg names to values for all
@@ -1197,32 +1320,16 @@ class LaunchFile:
         * text -- the given text
 
         '''
-        # Regular expression to find an arg substitution within text:
-        #    $(find package)/launch/$(arg camera).launch
-        pattern = re.compile(self.FindArgsPattern)
-
         # Name value pair for all arg substitutions in the text
         argSubs = {}
 
-        # Continue until all substitution arguments in the text
-        # have been found
-        results = pattern.search(text)
-        while results is not None:
-            fullText = results.group()
-            name = results.groups()[0]  # Only a single group
-
-            # Look up the value of the argument (this will raise an
-            # Exception if the arg cannot be found)
-            value = self.__onArgSubstitutionArg(name)
-
-            # Store the argument for the return value
-            argSubs[name] = value
-
-            # Remove substitution argument and continue looking for others
-            text = text.replace(fullText, "")
-
-            # Check for another substitution
-            results = pattern.search(text)
+        # Find all arg substitutions within the text in a single pass, e.g.,:
+        #    $(find package)/launch/$(arg camera).launch
+        for name in self.FindArgsRegex.findall(text):
+            if name not in argSubs:
+                # Look up the value of the argument (this will raise an
+                # Exception if the arg cannot be found)
+                argSubs[name] = self.__onArgSubstitutionArg(name)
 
         return argSubs
 
@@ -1241,27 +1348,78 @@ class LaunchFile:
         * element -- the ROS launch element
 
         '''
-        # Handle the 'if' argument
-        ifCase = element.attrib.get(self.IfAttribute, None)
-        if ifCase is not None:
-            ifCase = self.__resolveText(ifCase)
-            if ifCase.lower() in ["false", "0"]:
-                return False  # Element is disabled
-            elif ifCase.lower() not in ["true", "1"]:
-                raise Exception("Invalid value in if attribute: %s" % ifCase)
-
-        # Handle the 'unless' argument
-        unlessCase = element.attrib.get(self.UnlessAttribute, None)
-        if unlessCase is not None:
-            unlessCase = self.__resolveText(unlessCase)
-            if unlessCase.lower() in ["true", "1"]:
-                return False  # Element is disabled
-            elif unlessCase.lower() not in ["false", "0"]:
-                raise Exception(
-                    "Invalid value in unless attribute: %s" % unlessCase)
+        attrib = element.attrib
+        ifCase = attrib.get(self.IfAttribute, None)
+        unlessCase = attrib.get(self.UnlessAttribute, None)
+
+        # Most elements are not conditional
+        if ifCase is None and unlessCase is None:
+            return True  # Element is enabled
+
+        # Element is disabled if the 'if' attribute is false
+        if ifCase is not None and \
+                not self.__getConditionalValue(self.IfAttribute, ifCase):
+            return False  # Element is disabled
+
+        # Element is disabled if the 'unless' attribute is true
+        if unlessCase is not None and \
+                self.__getConditionalValue(self.UnlessAttribute, unlessCase):
+            return False  # Element is disabled
 
         return True  # Element is enabled
 
+    def __getConditionalValue(self, attribute, case):
+        '''Get the boolean value represented by the value of an if or
+        unless attribute. Raises an Exception if the value is not valid.
+
+        * attribute -- the name of the attribute (e.g., if, unless)
+        * case -- the unresolved value of the attribute
+
+        '''
+        # Literal values (e.g., if="true") are found without resolving
+        value = self.ConditionalValues.get(case, None)
+        if value is None:
+            case = self.__resolveText(case)
+            value = self.ConditionalValues.get(case, None)
+            if value is None:
+                # Only lowercase values with unusual capitalization
+                # (e.g., "tRuE") that are not found as is
+                value = self.ConditionalValues.get(case.lower(), None)
+                if value is None:
+                    raise Exception("Invalid value in %s attribute: %s" %
+                                    (attribute, case))
+
+        return value
+
+    def __reportError(self):
+        '''Print the traceback for the exception that is currently being
+        handled, unless an identical error has already been reported for
+        this launch file. Returns True if the error was reported, False
+        otherwise.
+
+        '''
+        error = exc_info()[1]
+        key = (self.__filename, type(error).__name__, str(error))
+        if key in REPORTED_ERRORS:
+            return False  # Already reported
+
+        REPORTED_ERRORS.add(key)
+        traceback.print_exc()
+        return True
+
+    def __getArgSubsLabel(self, argSubs):
+        '''Convert all arg name value pairs into a single string, e.g., given
+        {"one": "two", "three": "four"} the resulting string should be:
+
+            "one:=two\\nthree:=four"
+
+        So that each arg pair is on its own line for improved readability.
+
+        * argSubs -- the dictionary mapping arg names to values
+
+        '''
+        return '\n'.join("%s:=%s" % item for item in argSubs.items())
+
     def __getArgumentForConditional(self, element, attribute):
         '''Parse the conditional (e.g., if, unless) value for a possible
         argument that is used to evaluate the conditional. This function
@@ -1272,12 +1430,12 @@ class LaunchFile:
         * attribute -- The attribute to look up (e.g., if, unless)
 
         '''
-        pattern = re.compile(self.SubArgsPattern)
+        pattern = self.SubArgsRegex
 
         case = element.attrib.get(attribute, None)
         if case is not None:
             # No need to label this conditional if it's hardcoded
-            if case not in ["true", "false", "0", "1"]:
+            if case not in self.ConditionalValues:
                 # Look for substitution arguments
                 results = pattern.search(case)
                 if results is not None:
@@ -1300,10 +1458,14 @@ class LaunchFile:
         * default -- the default value
 
         '''
-        value = element.attrib.get(attribute, default)
-        if value is None:
+        # Attributes are expected to be present in nearly all cases
+        attrib = element.attrib
+        if attribute in attrib:
+            return attrib[attribute]
+
+        if default is None:
             raise Exception("Missing the %s attribute" % attribute)
-        return value
+        return default
 
 
 if __name__ == '__main__':
@@ -1369,74 +1531,76 @@ if __name__ == '__main__':
             name, value = parts
             overrideArgs[name] = value
         else:
-            print "ERROR: invalid syntax for arg %s: %s" % (index, argStr)
-            print "       Args must be specified as NAME:=VALUE"
+            print("ERROR: invalid syntax for arg %s: %s" % (index, argStr))
+            print("       Args must be specified as NAME:=VALUE")
             exit(1)
 
     ##### Validate the input arguments
 
     # Make sure the launch file exists
     if not exists(launchFile):
-        print "ERROR: Can not find launch file: %s" % launchFile
+        print("ERROR: Can not find launch file: %s" % launchFile)
         exit(2)
 
     # Make sure the file is actually a launch file
     # (ending in .launch, .test or .xml)
-    launchFileBaseName, launchFileExtension = splitext(launchFile.lower())
-    if not launchFileExtension in LAUNCH_FILE_TYPES:
+    launchFileExtension = splitext(launchFile)[1].lower()
+    if launchFileExtension not in LAUNCH_FILE_TYPES:
         filetypes = ', '.join(LAUNCH_FILE_TYPES)
-        print "ERROR: Must be given a supported filetype: %s: %s" % \
-            (filetypes, launchFile)
+        print("ERROR: Must be given a supported filetype: %s: %s" %
+              (filetypes, launchFile))
         exit(3)
 
     ##### Parse the launch file as XML
     try:
         launchFile = LaunchFile(args, launchFile, overrideArgs=overrideArgs)
-    except:
+    except Exception:
         traceback.print_exc()
-        print "ERROR: failed to parse launch file: %s" % launchFile
+        print("ERROR: failed to parse launch file: %s" % launchFile)
         exit(4)
 
     ##### Convert the launch file tree to a dot file
     try:
         graph = launchFile.toDot()
-    except:
+    except Exception:
         traceback.print_exc()
-        print "ERROR: failed to generate dot file contents..."
+        print("ERROR: failed to generate dot file contents...")
         exit(5)
     else:
         ##### Save the dot file
         graph.write(dotFilename)
 
+        # All converted files use the same base name as the dot file. Only
+        # the extension is replaced, so a directory name that contains
+        # ".dot" is left untouched
+        baseFilename = splitext(dotFilename)[0]
+
         ##### Convert the dot file into a PNG
         if args.convertToPng:
-            print "Converting dot file into PNG..."
+            print("Converting dot file into PNG...")
 
-            # Use the same base name as the dot file for the png
-            pngFilename = splitext(dotFilename)[0] + ".png"
+            pngFilename = baseFilename + ".png"
 
             # create png
             graph.draw(pngFilename, prog="dot")
-            print "PNG saved to: %s" % pngFilename
+            print("PNG saved to: %s" % pngFilename)
 
         ##### Convert the dot file into an SVG
         if args.convertToSvg:
-            print "Converting dot file into SVG..."
+            print("Converting dot file into SVG...")
 
-            # Use the same base name as the dot file for the svg
-            svgFilename = splitext(dotFilename)[0] + ".svg"
+            svgFilename = baseFilename + ".svg"
 
             # create png
             graph.draw(svgFilename, prog="dot", format="svg")
-            print "SVG saved to: %s" % svgFilename
+            print("SVG saved to: %s" % svgFilename)
 
         ##### Convert the dot file into an PDF
         if args.convertToPdf:
-            print "Converting dot file into PDF..."
+            print("Converting dot file into PDF...")
 
-            # Use the same base name as the dot file for the pdf
-            pdfFilename = splitext(dotFilename)[0] + ".pdf"
+            pdfFilename = baseFilename + ".pdf"
 
             # create png
             graph.draw(pdfFilename, prog="dot", format="pdf")
-            print "PDF saved to: %s" % pdfFilename
+            print("PDF saved to: %s" % pdfFilename)
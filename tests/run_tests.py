@@ -1,9 +1,11 @@
 '''
 Run this from the roslaunch_to_dot directory using the following command:
 
-   ROS_PACKAGE_PATH=$PWD/examples:$ROS_PACKAGE_PATH python ./tests/run_tests.py
+   ROS_PACKAGE_PATH=$PWD/examples:$ROS_PACKAGE_PATH python3 ./tests/run_tests.py
 
 '''
+from __future__ import print_function
+
 import sys
 import inspect
 import unittest
@@ -25,12 +27,15 @@ from test_disable_groups import TestDisableGroups
 from test_nodes_same_name import TestNodesSameName
 from test_missing_launch_file import TestMissingLaunchFile
 from test_dirname import TestDirname
+from test_include_edges import TestIncludeEdges
+from test_arg_redefined import TestArgRedefined
+from test_missing_attribute import TestMissingAttribute
 
 # Check for the ROS environment
 try:
     import roslib
 except:
-    print "ERROR: you must run this from the ROS environment"
+    print("ERROR: you must run this from the ROS environment")
     exit(0)
 
 
@@ -38,13 +43,13 @@ if __name__ == '__main__':
     # Make sure we can find the examples directory
     examplesDir = join(environ.get("PWD"), "examples")
     if not exists(examplesDir):
-        print "ERROR: Must be run from the roslaunch_to_dot directory!"
+        print("ERROR: Must be run from the roslaunch_to_dot directory!")
         exit(1)
 
     # Make sure we can find the ROS package path
     rosPackagePath = environ.get("ROS_PACKAGE_PATH", None)
     if rosPackagePath is None:
-        print "ERROR: Cannot find ROS_PACKAGE_PATH!"
+        print("ERROR: Cannot find ROS_PACKAGE_PATH!")
         exit(2)
 
     # Add the examples directory to the ROS package path so that ROS
@@ -53,8 +58,8 @@ if __name__ == '__main__':
 
     # Make sure ROS can find the packages in the examples directory
     if examplesDir not in rosPackagePath:
-        print "ERROR: The roslaunch_to_dot/examples directory must be in " \
-            "your ROS_PACKAGE_PATH!"
+        print("ERROR: The roslaunch_to_dot/examples directory must be in "
+              "your ROS_PACKAGE_PATH!")
         exit(3)
 
     # Automatically locate all items in the module that are TestCases
@@ -0,0 +1,30 @@
+import unittest
+
+from util import roslaunch_to_dot, ErrorMsg
+
+
+class TestArgRedefined(unittest.TestCase):
+    def testArgRedefinedInGroup(self):
+        launchFile = "examples/fake_package/launch/arg_redefined.launch"
+
+        status, output, graph = roslaunch_to_dot(launchFile)
+
+        # Should not have failed
+        self.assertEqual(status, 0)
+
+        # Each node name must be resolved with the value of the arg at the
+        # point where the node is defined, even though the text used for
+        # both node names is identical
+        nodeOne = graph.get_node("node_fake_package_fake_n_one")
+        self.assertIsNotNone(nodeOne)
+
+        nodeTwo = graph.get_node("node_fake_package_fake_n_two")
+        self.assertIsNotNone(nodeTwo)
+
+        # The two nodes should not be reported as having the same name
+        numWarnings = output.count(ErrorMsg.NodesWithSameName % "n_one")
+        self.assertEqual(numWarnings, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
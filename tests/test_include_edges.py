@@ -0,0 +1,42 @@
+import unittest
+
+from util import roslaunch_to_dot, Color
+
+
+class TestIncludeEdges(unittest.TestCase):
+    def testIncludeSameFileSeveralTimes(self):
+        launchFile = "examples/fake_package/launch/example.launch"
+
+        status, output, graph = roslaunch_to_dot(launchFile)
+
+        # Should not have failed
+        self.assertEqual(status, 0)
+
+        # Make sure the proper nodes exist
+        exampleLaunch = graph.get_node("launch_fake_package_example")
+        self.assertIsNotNone(exampleLaunch)
+
+        tripletLaunch = graph.get_node("launch_fake_package_triplet")
+        self.assertIsNotNone(tripletLaunch)
+
+        fakeNode = graph.get_node("node_fake_package_fake_fake_node")
+        self.assertIsNotNone(fakeNode)
+
+        edges = graph.edges()
+
+        # example.launch includes triplet.launch three times, but there
+        # should only be a single edge between the two launch files
+        example2Triplet = edges.count((exampleLaunch, tripletLaunch))
+        self.assertEqual(example2Triplet, 1)
+
+        # The node in triplet.launch should only be connected once
+        triplet2Node = edges.count((tripletLaunch, fakeNode))
+        self.assertEqual(triplet2Node, 1)
+
+        # Make sure the include edge is a normal line
+        edge = graph.get_edge(exampleLaunch, tripletLaunch)
+        self.assertEqual(edge.attr["color"], Color.Line)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from util import roslaunch_to_dot, ErrorMsg
+
+
+class TestMissingAttribute(unittest.TestCase):
+    def testMissingTypeReportedPerLaunchFile(self):
+        launchFile = "examples/fake_package/launch/missing_type.launch"
+
+        status, output, graph = roslaunch_to_dot(launchFile)
+
+        # Should not have failed (the errors get caught and do not
+        # propagate to the top level)
+        self.assertEqual(status, 0)
+
+        # The error should be reported TWICE: missing_type.launch has two
+        # identical broken nodes which are only reported once, and its
+        # included launch file has one more which must still be reported
+        numErrors = output.count(ErrorMsg.MissingAttribute % "type")
+        self.assertEqual(numErrors, 2)
+
+        # Both launch files should still be in the graph
+        missingType = graph.get_node("launch_fake_package_missing_type")
+        self.assertIsNotNone(missingType)
+
+        include = graph.get_node("launch_fake_package_missing_type_include")
+        self.assertIsNotNone(include)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,14 @@
 from os import environ
 from os.path import join
-from commands import getstatusoutput
+try:
+    from subprocess import getstatusoutput
+except ImportError:
+    from commands import getstatusoutput  # Python 2
 
 try:
     import pygraphviz as gv
 except ImportError:
-    raise ImportError("Please run 'sudo apt-get install python-pygraphviz'")
+    raise ImportError("Please run 'sudo apt-get install python3-pygraphviz'")
 
 
 # This list must match the one from the script
@@ -20,6 +23,7 @@ class ErrorMsg:
     Cycle = "ERROR: There is a cycle in the launch file graph from:"
     FailedToGetPackage = "Failed to get package name for: %s"
     MissingArg = "Could not resolve unknown arg: '%s'"
+    MissingAttribute = "Missing the %s attribute"
     MissingEnvVar = "Could not find environment variable: '%s'"
     MissingLaunchFile = "WARNING: Could not locate launch file"
     NodesWithSameName = "WARNING: There are two nodes in the launch tree " \